@@ -14,103 +14,127 @@ temp_norm_error_key = "temporal norm"
 pcamv_error_key = "pca multiview"
 pcasv_error_key = "pca singleview"
 
+_temporal_norm_suffix = "_temporal_norm.csv"
+
+# substrings of precomputed metric file names, mapped to the metric they contain
+_metric_file_tokens = [
+    ("single", pcasv_error_key),
+    ("multi", pcamv_error_key),
+    ("temporal", temp_norm_error_key),
+    ("pixel", pix_error_key),
+]
+
+
+def _scan_dirs(folder: str) -> List[str]:
+    # like os.walk, treat missing or unreadable directories as empty
+    try:
+        with os.scandir(folder) as it:
+            return [e.path for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
 
 @st.cache_resource
+def _list_files(folder: str) -> Tuple[str, ...]:
+    # scan each folder once per process (the cache is shared across sessions); returned as
+    # a tuple so the shared cached value cannot be modified by callers
+    with os.scandir(folder) as it:
+        return tuple(e.name for e in it if e.is_file())
+
+
+@st.cache_data
 def update_labeled_file_list(model_preds_folders: list, use_ood: bool = False):
-    per_model_preds = []
-    for model_pred_folder in model_preds_folders:
-        # pull labeled results from each model folder
-        # wrap in Path so that it looks like an UploadedFile object
-        model_preds = [f for f in os.listdir(model_pred_folder)
-                       if os.path.isfile(os.path.join(model_pred_folder, f))]
-        ret_files = []
-        for file in model_preds:
-            if 'predictions' in file:
-                if 'new' not in file and not use_ood:
-                    ret_files.append(Path(file))
-                elif 'new' in file and use_ood:
-                    ret_files.append(Path(file))
-                else:
-                    pass
-        per_model_preds.append(ret_files)
-    return per_model_preds
+    # pull labeled results from each model folder; keep in-distribution files by default,
+    # ood ("new") files if requested
+    # wrap in Path so that it looks like an UploadedFile object
+    return tuple(
+        tuple(
+            Path(file) for file in _list_files(model_pred_folder)
+            if 'predictions' in file and ('new' in file) == use_ood
+        )
+        for model_pred_folder in model_preds_folders
+    )
 
 
-@st.cache_resource
+@st.cache_data
 def update_vid_metric_files_list(video: str, model_preds_folders: list):
-    per_vid_preds = []
-    for model_preds_folder in model_preds_folders:
-        # pull each prediction file associated with a particular video
-        # wrap in Path so that it looks like an UploadedFile object
-        model_preds = [f for f in os.listdir(os.path.join(model_preds_folder, 'video_preds'))
-                       if os.path.isfile(os.path.join(model_preds_folder, 'video_preds', f))]
-        ret_files = []
-        for file in model_preds:
-            if video in file:
-                ret_files.append(Path(file))
-        per_vid_preds.append(ret_files)
-    return per_vid_preds
+    # pull each prediction file associated with a particular video
+    # wrap in Path so that it looks like an UploadedFile object
+    return tuple(
+        tuple(
+            Path(file) for file in _list_files(os.path.join(model_preds_folder, 'video_preds'))
+            if video in file
+        )
+        for model_preds_folder in model_preds_folders
+    )
 
 
-@st.cache_resource
+@st.cache_data
 def get_all_videos(model_preds_folders: list):
     # find each video that is predicted on by the models
     # wrap in Path so that it looks like an UploadedFile object
     # returned by streamlit's file_uploader
     ret_videos = set()
     for model_preds_folder in model_preds_folders:
-        model_preds = [f for f in os.listdir(os.path.join(model_preds_folder, 'video_preds'))
-                       if os.path.isfile(os.path.join(model_preds_folder, 'video_preds', f))]
-        for file in model_preds:
-            if 'temporal' in file:
-                vid_file = file.split('_temporal_norm.csv')[0]
-                ret_videos.add(vid_file)
-            elif 'temporal' not in file and 'pca' not in file:
-                vid_file = file.split('.csv')[0]
-                ret_videos.add(vid_file)
-    return list(ret_videos)
+        for file in _list_files(os.path.join(model_preds_folder, 'video_preds')):
+            if file.endswith(_temporal_norm_suffix):
+                ret_videos.add(file[:-len(_temporal_norm_suffix)])
+            elif file.endswith('.csv') and 'pca' not in file:
+                ret_videos.add(file[:-len('.csv')])
+    return tuple(ret_videos)
 
 
 @st.cache_data
 def concat_dfs(dframes: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, List[str]]:
-    counter = 0
-    for model_name, dframe in dframes.items():
-        if counter == 0:
-            df_concat = dframe.copy()
-            # base_colnames = list(df_concat.columns.levels[0])  # <-- sorts names, bad!
-            base_colnames = list([c[0] for c in df_concat.columns[1::3]])
-            df_concat = strip_cols_append_name(df_concat, model_name)
-        else:
-            df = strip_cols_append_name(dframe.copy(), model_name)
-            df_concat = pd.concat([df_concat, df], axis=1)
-        counter += 1
+    frames = []
+    base_colnames = None
+    for i, (model_name, dframe) in enumerate(dframes.items()):
+        if i == 0:
+            # base_colnames = list(dframe.columns.levels[0])  # <-- sorts names, bad!
+            base_colnames = list([c[0] for c in dframe.columns[1::3]])
+        frames.append(strip_cols_append_name(dframe, model_name))
+    # concatenate once at the end rather than growing the frame model by model
+    df_concat = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
     return df_concat, base_colnames
 
 
 @st.cache_data
 def get_df_box(df_orig, keypoint_names, model_names):
-    df_boxes = []
+    # split by model in a single pass over the model_name column
+    groups = dict(tuple(df_orig.groupby("model_name", sort=False)))
+    by_model = {m: groups.get(m, df_orig.iloc[:0]) for m in model_names}
+    kp_col, model_col, val_col, idx_col = [], [], [], []
     for keypoint in keypoint_names:
         for model_curr in model_names:
-            tmp_dict = {
-                "keypoint": keypoint,
-                "metric": "Pixel error",
-                "value": df_orig[df_orig.model_name == model_curr][keypoint],
-                "model_name": model_curr,
-            }
-            df_boxes.append(pd.DataFrame(tmp_dict))
-    return pd.concat(df_boxes)
+            values = by_model[model_curr][keypoint]
+            kp_col.extend([keypoint] * len(values))
+            model_col.extend([model_curr] * len(values))
+            val_col.append(values.to_numpy())
+            idx_col.append(values.index.to_numpy())
+    return pd.DataFrame(
+        {
+            "keypoint": kp_col,
+            "metric": "Pixel error",
+            "value": np.concatenate(val_col),
+            "model_name": model_col,
+        },
+        index=np.concatenate(idx_col),
+    )
 
 
 @st.cache_data
 def get_df_scatter(df_0, df_1, data_type, model_names, keypoint_names):
+    # compute the data split masks once, rather than once per keypoint; keep the Series so
+    # that rows from the two models are still paired by index (i.e. by labeled frame)
+    df_0_ = df_0[df_0.set == data_type]
+    df_1_ = df_1[df_1.set == data_type]
     df_scatters = []
     for keypoint in keypoint_names:
         df_scatters.append(pd.DataFrame({
-            "img_file": df_0.img_file[df_0.set == data_type],
+            "img_file": df_0_.img_file,
             "keypoint": keypoint,
-            model_names[0]: df_0[keypoint][df_0.set == data_type],
-            model_names[1]: df_1[keypoint][df_1.set == data_type],
+            model_names[0]: df_0_[keypoint],
+            model_names[1]: df_1_[keypoint],
         }))
     return pd.concat(df_scatters)
 
@@ -120,13 +144,14 @@ def get_col_names(keypoint: str, coordinate: str, models: List[str]) -> List[str
 
 
 def strip_cols_append_name(df: pd.DataFrame, name: str) -> pd.DataFrame:
-    df.columns = ["_".join(col).strip() for col in df.columns.values]
-    df.columns = [col + "_" + name for col in df.columns.values]
-    return df
+    # only the column labels change, so share the underlying data instead of copying it
+    suffix = "_" + name
+    new_cols = ["_".join(col).strip() + suffix for col in df.columns.to_flat_index()]
+    return df.set_axis(new_cols, axis=1, copy=False)
 
 
 def get_full_name(keypoint: str, coordinate: str, model: str) -> str:
-    return "_".join([keypoint, coordinate, model])
+    return f"{keypoint}_{coordinate}_{model}"
 
 
 # ----------------------------------------------
@@ -143,33 +168,39 @@ def build_precomputed_metrics_df(
                 df_ = compute_confidence(
                     df=df, keypoint_names=keypoint_names, model_name=model_name, **kwargs)
                 concat_dfs[conf_error_key].append(df_)
+                continue
 
+            metric_key = next(
+                (key for token, key in _metric_file_tokens if token in metric_name), None)
+            if metric_key is None:
+                continue
             df_ = get_precomputed_error(df, keypoint_names, model_name, **kwargs)
-            if 'single' in metric_name:
-                concat_dfs[pcasv_error_key].append(df_)
-            elif 'multi' in metric_name:
-                concat_dfs[pcamv_error_key].append(df_)
-            elif 'temporal' in metric_name:
-                concat_dfs[temp_norm_error_key].append(df_)
-            elif 'pixel' in metric_name:
-                concat_dfs[pix_error_key].append(df_)
-
-    for key in concat_dfs.keys():
-        concat_dfs[key] = pd.concat(concat_dfs[key])
+            concat_dfs[metric_key].append(df_)
+
+    concat_dfs = {
+        key: pd.concat(dfs) if len(dfs) > 1 else dfs[0] for key, dfs in concat_dfs.items()
+    }
 
     return concat_dfs
 
 
+def _nanmean_rows(values: np.ndarray) -> np.ndarray:
+    # all-NaN rows are expected (e.g. the first frame of a temporal norm file); return NaN
+    # for them silently, like DataFrame.mean. np.errstate is local to this thread, unlike
+    # warnings.catch_warnings, and only hides the 0 / 0 of an all-NaN row
+    with np.errstate(invalid="ignore"):
+        return np.nansum(values, axis=1) / (~np.isnan(values)).sum(axis=1)
+
+
 @st.cache_data
 def get_precomputed_error(
     df: pd.DataFrame, keypoint_names: List[str], model_name: str
 ) -> pd.DataFrame:
-    # collect results
-    df_ = df
-    df_["model_name"] = model_name
-    df_["mean"] = df_[keypoint_names[:-1]].mean(axis=1)
-    df_.rename(columns={df.columns[0]:'img_file'}, inplace=True)
-
+    # the input may be a cached object and must not be mutated; assign makes the one copy,
+    # which is then renamed in place
+    df_ = df.assign(
+        model_name=model_name, mean=_nanmean_rows(df[keypoint_names[:-1]].to_numpy()))
+    df_.rename(columns={df.columns[0]: 'img_file'}, inplace=True)
     return df_
 
 
@@ -179,23 +210,22 @@ def compute_confidence(
 
     if df.shape[1] % 3 == 1:
         # get rid of "set" column if present
-        tmp = df.iloc[:, :-1].to_numpy().reshape(df.shape[0], -1, 3)
+        values = df.iloc[:, :-1].to_numpy()
         set = df.iloc[:, -1].to_numpy()
     else:
-        tmp = df.to_numpy().reshape(df.shape[0], -1, 3)
+        values = df.to_numpy()
         set = None
 
-    results = tmp[:, :, 2]
+    # columns are ordered (x, y, likelihood) for each keypoint
+    results = values[:, 2::3]
 
     # collect results
-    df_ = pd.DataFrame(columns=keypoint_names)
-    for c, col in enumerate(keypoint_names):  # loop over keypoints
-        df_[col] = results[:, c]
-    df_["model_name"] = model_name
-    df_["mean"] = df_[keypoint_names[:-1]].mean(axis=1)
+    df_ = pd.DataFrame(results, columns=keypoint_names)
+    extra_cols = {"model_name": model_name, "mean": _nanmean_rows(results[:, :-1])}
     if set is not None:
-        df_["set"] = set
-        df_["img_file"] = df.index
+        extra_cols["set"] = set
+        extra_cols["img_file"] = df.index
+    df_ = df_.assign(**extra_cols)
 
     return df_
 
@@ -206,18 +236,15 @@ def get_model_folders(model_dir):
     # strip trailing slash if present
     if model_dir[-1] == os.sep:
         model_dir = model_dir[:-1]
-    model_folders = []
-    # find all directories two levels deep
-    for root, dirs, files in os.walk(model_dir):
-        if root.count(os.sep) - model_dir.count(os.sep) == 2:
-            model_folders.append(root)
+    # find all directories two levels deep; no need to walk any further down the tree
+    model_folders = [
+        folder for subdir in _scan_dirs(model_dir) for folder in _scan_dirs(subdir)
+    ]
     return model_folders
 
 
 # just to get the last two levels of the path
 def get_model_folders_vis(model_folders):
-    fs = []
-    for f in model_folders:
-        fs.append(f.split('/')[-2:])
-    model_folders_vis = [os.path.join(*f) for f in fs]
+    # only split off the last two components, using the platform separator
+    model_folders_vis = [os.path.join(*f.rsplit(os.sep, 2)[-2:]) for f in model_folders]
     return model_folders_vis
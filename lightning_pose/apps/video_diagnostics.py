@@ -52,7 +52,7 @@ def run():
     selected_models = ["/" + os.path.join(args.model_dir, f) for f in selected_models_vis]
     
     # ----- selecting videos to analyze -----
-    all_videos_: list = get_all_videos(selected_models)
+    all_videos_: tuple = get_all_videos(selected_models)
 
     # choose from the different videos that were predicted
     video_to_plot = st.sidebar.selectbox("Select a video:", [*all_videos_], key="video")
@@ -0,0 +1,177 @@
+"""Test streamlit app utility functions."""
+
+import numpy as np
+import pandas as pd
+
+
+def test_get_df_box():
+
+    from lightning_pose.apps.utils import get_df_box
+
+    keypoint_names = ["paw_l", "paw_r", "nose"]
+    model_names = ["model_a", "model_b", "model_missing"]
+    n_frames = 6
+
+    # mimic the stacked per-model metric frames, which repeat the frame index for each model
+    dfs = []
+    for model_name in model_names[:2]:
+        df = pd.DataFrame(
+            np.random.rand(n_frames, len(keypoint_names)), columns=keypoint_names)
+        df["model_name"] = model_name
+        dfs.append(df)
+    df_orig = pd.concat(dfs)
+
+    # original implementation: one small frame per (keypoint, model) pair
+    df_boxes = []
+    for keypoint in keypoint_names:
+        for model_curr in model_names:
+            df_boxes.append(pd.DataFrame({
+                "keypoint": keypoint,
+                "metric": "Pixel error",
+                "value": df_orig[df_orig.model_name == model_curr][keypoint],
+                "model_name": model_curr,
+            }))
+    df_expected = pd.concat(df_boxes)
+
+    df_box = get_df_box(df_orig, keypoint_names, model_names)
+    assert df_box.shape == (n_frames * len(keypoint_names) * 2, 4)
+    pd.testing.assert_frame_equal(df_box, df_expected)
+
+
+def test_get_df_scatter():
+
+    from lightning_pose.apps.utils import get_df_scatter
+
+    keypoint_names = ["paw_l", "paw_r"]
+    model_names = ["model_a", "model_b"]
+    n_frames = 8
+    img_files = [f"img{i:03d}.png" for i in range(n_frames)]
+
+    def make_df(model_name, sets):
+        df = pd.DataFrame(
+            np.random.rand(n_frames, len(keypoint_names)), columns=keypoint_names)
+        df["img_file"] = img_files
+        df["set"] = sets
+        df["model_name"] = model_name
+        return df
+
+    # the two models were trained with different data splits, so their "train" frames differ
+    df_0 = make_df(model_names[0], ["train"] * 5 + ["validation"] * 3)
+    df_1 = make_df(model_names[1], ["validation"] * 2 + ["train"] * 6)
+
+    # original implementation: pandas aligns the two models on the frame index
+    df_expected = pd.concat([
+        pd.DataFrame({
+            "img_file": df_0.img_file[df_0.set == "train"],
+            "keypoint": keypoint,
+            model_names[0]: df_0[keypoint][df_0.set == "train"],
+            model_names[1]: df_1[keypoint][df_1.set == "train"],
+        })
+        for keypoint in keypoint_names
+    ])
+
+    df_scatter = get_df_scatter(df_0, df_1, "train", model_names, keypoint_names)
+    pd.testing.assert_frame_equal(df_scatter, df_expected)
+
+    # values from both models come from the same labeled frame
+    row = df_scatter[df_scatter.keypoint == "paw_l"].loc[3]
+    assert row.img_file == img_files[3]
+    assert row[model_names[0]] == df_0.loc[3, "paw_l"]
+    assert row[model_names[1]] == df_1.loc[3, "paw_l"]
+
+
+def test_compute_confidence():
+
+    from lightning_pose.apps.utils import compute_confidence
+
+    keypoint_names = ["paw_l", "paw_r", "nose"]
+    n_frames = 5
+
+    # mimic a predictions csv loaded with header=[1, 2], index_col=0
+    columns = pd.MultiIndex.from_product([keypoint_names, ["x", "y", "likelihood"]])
+    values = np.random.rand(n_frames, len(columns))
+    index = [f"img{i:03d}.png" for i in range(n_frames)]
+    likelihoods = values[:, 2::3]
+
+    # no "set" column
+    df = pd.DataFrame(values, columns=columns, index=index)
+    df_ = compute_confidence(df=df, keypoint_names=keypoint_names, model_name="model_a")
+    assert list(df_.columns) == keypoint_names + ["model_name", "mean"]
+    assert np.allclose(df_[keypoint_names].to_numpy(), likelihoods)
+    assert np.all(df_.model_name == "model_a")
+    assert np.allclose(df_["mean"], likelihoods[:, :-1].mean(axis=1))
+
+    # with "set" column; all-nan rows give a nan mean
+    df = pd.DataFrame(values, columns=columns, index=index)
+    df.iloc[0, :] = np.nan
+    df[("set", "")] = ["train"] * 3 + ["test"] * 2
+    df_ = compute_confidence(df=df, keypoint_names=keypoint_names, model_name="model_b")
+    assert list(df_.columns) == keypoint_names + ["model_name", "mean", "set", "img_file"]
+    assert np.allclose(df_[keypoint_names].to_numpy()[1:], likelihoods[1:])
+    assert np.isnan(df_["mean"].iloc[0])
+    assert np.allclose(df_["mean"].iloc[1:], likelihoods[1:, :-1].mean(axis=1))
+    assert list(df_.set) == ["train"] * 3 + ["test"] * 2
+    assert list(df_.img_file) == index
+
+
+def test_get_model_folders(tmp_path):
+
+    import os
+
+    from lightning_pose.apps.utils import get_model_folders
+
+    model_dir = tmp_path / "models"
+    for path in ["2023-01-01/model_a/video_preds", "2023-01-01/model_b", "2023-01-02/model_c"]:
+        (model_dir / path).mkdir(parents=True)
+    (model_dir / "notes.txt").touch()
+    (model_dir / "2023-01-01" / "config.yaml").touch()
+    # symlinked directories are not walked into
+    (tmp_path / "elsewhere" / "model_d").mkdir(parents=True)
+    os.symlink(tmp_path / "elsewhere" / "model_d", model_dir / "2023-01-02" / "model_link")
+    os.symlink(tmp_path / "elsewhere", model_dir / "date_link")
+
+    # original implementation: walk the whole tree and keep directories two levels deep
+    model_dir_str = str(model_dir)
+    expected = [
+        root for root, _, _ in os.walk(model_dir_str)
+        if root.count(os.sep) - model_dir_str.count(os.sep) == 2
+    ]
+
+    model_folders = get_model_folders(model_dir_str)
+    assert sorted(model_folders) == sorted(expected)
+    assert sorted(model_folders) == [
+        os.path.join(model_dir_str, "2023-01-01", "model_a"),
+        os.path.join(model_dir_str, "2023-01-01", "model_b"),
+        os.path.join(model_dir_str, "2023-01-02", "model_c"),
+    ]
+
+    # trailing separator is ignored
+    assert sorted(get_model_folders(model_dir_str + os.sep)) == sorted(expected)
+
+    # missing model directory returns no folders rather than raising
+    assert get_model_folders(str(tmp_path / "missing")) == []
+
+
+def test_get_all_videos(tmp_path):
+
+    from lightning_pose.apps.utils import get_all_videos
+
+    model_a = tmp_path / "model_a"
+    model_b = tmp_path / "model_b"
+    for model in [model_a, model_b]:
+        (model / "video_preds").mkdir(parents=True)
+    for file in [
+        "vid0.csv",
+        "vid0_temporal_norm.csv",
+        "vid0_pca_singleview_error.csv",
+        "vid0_pca_multiview_error.csv",
+        "vid1_temporal_norm.csv",
+        "notes.txt",
+    ]:
+        (model_a / "video_preds" / file).touch()
+    (model_b / "video_preds" / "vid2.csv").touch()
+    (model_b / "video_preds" / "vid2_pca_singleview_error.csv").touch()
+
+    videos = get_all_videos([str(model_a), str(model_b)])
+    assert isinstance(videos, tuple)
+    assert sorted(videos) == ["vid0", "vid1", "vid2"]